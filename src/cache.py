@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from exif_loader import takeout_sidecars
+from json_utils import json_dumps, json_loads
+from types_ import PhotoMeta
+
+# (path, mtime_ns, size, ((sidecar name, mtime_ns), ...)): a changed or replaced
+# photo gets a new key, and so does one whose Takeout sidecar appears, changes or
+# goes away (Takeout often ships the JSON in a different archive part)
+CacheKey = Tuple[str, int, int, Tuple[Tuple[str, int], ...]]
+
+CACHE_VERSION = 2
+
+
+def cache_key(path: Path) -> Optional[CacheKey]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    sidecars = []
+    for c in takeout_sidecars(path):
+        try:
+            sidecars.append((c.name, c.stat().st_mtime_ns))
+        except OSError:
+            continue
+    return (str(path), st.st_mtime_ns, st.st_size, tuple(sidecars))
+
+
+def load_cache(cache_file: Path) -> Dict[CacheKey, PhotoMeta]:
+    """
+    Load the metadata manifest written by save_cache.
+    A missing, unreadable or outdated manifest is treated as empty.
+    """
+    try:
+        data = json_loads(cache_file.read_bytes())
+    except Exception:
+        return {}
+    if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+        return {}
+
+    cache: Dict[CacheKey, PhotoMeta] = {}
+    for rec in data.get("items") or []:
+        try:
+            key = (
+                rec["path"],
+                int(rec["mtime_ns"]),
+                int(rec["size"]),
+                tuple((str(n), int(t)) for n, t in rec.get("sidecars") or ()),
+            )
+            cache[key] = PhotoMeta(
+                path=Path(rec["path"]),
+                lat=rec.get("lat"),
+                lon=rec.get("lon"),
+                datetime=rec.get("datetime"),
+                make=rec.get("make"),
+                model=rec.get("model"),
+                extra=rec.get("extra") or {},
+            )
+        except Exception:
+            continue
+    return cache
+
+
+def save_cache(cache_file: Path, entries: Iterable[Tuple[CacheKey, PhotoMeta]]):
+    items = [
+        {
+            "path": key[0],
+            "mtime_ns": key[1],
+            "size": key[2],
+            "sidecars": key[3],
+            "lat": m.lat,
+            "lon": m.lon,
+            "datetime": m.datetime,
+            "make": m.make,
+            "model": m.model,
+            "extra": m.extra,
+        }
+        for key, m in entries
+    ]
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    cache_file.write_bytes(json_dumps({"version": CACHE_VERSION, "items": items}))
@@ -1,14 +1,29 @@
 from __future__ import annotations
 
-import json
+import csv
 import os
+from array import array
+from itertools import compress
+from math import isnan
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
-import pandas as pd
+import numpy as np
 
+from geo_utils import COORD_DECIMALS
+from json_utils import json_dumps
 from types_ import PhotoMeta
 
+_NAN = float("nan")
+
+# Large explicit buffer so streamed outputs hit the disk in few, big writes
+_WRITE_BUFFER = 1 << 20
+
+
+def _opt(x: float) -> Optional[float]:
+    """NaN placeholder back to None."""
+    return None if isnan(x) else x
+
 
 def _safe_rel(from_dir: Path, file_path: Path) -> Optional[str]:
     """
@@ -23,83 +38,165 @@ def _safe_rel(from_dir: Path, file_path: Path) -> Optional[str]:
 
 
 class PhotoRepository:
-    """Single-responsibility: store & export PhotoMeta records."""
+    """
+    Single-responsibility: store & export PhotoMeta records.
+    Records are held column-wise: coordinates in float64 arrays (NaN = missing)
+    and the remaining fields in parallel lists, so bulk passes stay cheap.
+    """
 
     def __init__(self):
-        self._items: List[PhotoMeta] = []
+        self._paths: List[Path] = []
+        self._lat = array("d")
+        self._lon = array("d")
+        self._dt: List[Optional[str]] = []
+        self._make: List[Optional[str]] = []
+        self._model: List[Optional[str]] = []
+        self._extra: List[Dict[str, str]] = []
         self._skipped: List[Path] = []
 
     def add(self, meta: PhotoMeta):
-        self._items.append(meta)
+        self._paths.append(meta.path)
+        self._lat.append(_NAN if meta.lat is None else meta.lat)
+        self._lon.append(_NAN if meta.lon is None else meta.lon)
+        self._dt.append(meta.datetime)
+        self._make.append(meta.make)
+        self._model.append(meta.model)
+        self._extra.append(meta.extra)
+
+    def add_many(self, metas: List[PhotoMeta]):
+        """Append a batch of records, extending each column once."""
+        self._paths.extend(m.path for m in metas)
+        self._lat.extend(_NAN if m.lat is None else m.lat for m in metas)
+        self._lon.extend(_NAN if m.lon is None else m.lon for m in metas)
+        self._dt.extend(m.datetime for m in metas)
+        self._make.extend(m.make for m in metas)
+        self._model.extend(m.model for m in metas)
+        self._extra.extend(m.extra for m in metas)
 
     def skip(self, path: Path):
         self._skipped.append(path)
 
     def items(self) -> List[PhotoMeta]:
-        return list(self._items)
-
-    def points(self) -> List[Tuple[float, float]]:
         return [
-            (m.lat, m.lon)
-            for m in self._items
-            if m.lat is not None and m.lon is not None
+            PhotoMeta(
+                path=p,
+                lat=_opt(lat),
+                lon=_opt(lon),
+                datetime=dt,
+                make=make,
+                model=model,
+                extra=extra,
+            )
+            for p, lat, lon, dt, make, model, extra in zip(
+                self._paths,
+                self._lat,
+                self._lon,
+                self._dt,
+                self._make,
+                self._model,
+                self._extra,
+            )
         ]
 
-    def to_geojson(self, out_html_path: Path, thumbs: Dict[Path, str] | None = None):
-        """
-        out_html_path = full path to output HTML (e.g., output/map.html).
-        We compute img_rel relative to out_html_path.parent so that the HTML can load originals if needed.
-        """
-        features = []
-        html_dir = out_html_path.parent
-
-        for m in self._items:
-            if m.lat is None or m.lon is None:
+    def _gps_mask(self) -> np.ndarray:
+        lat = np.frombuffer(self._lat, dtype=np.float64)
+        lon = np.frombuffer(self._lon, dtype=np.float64)
+        return ~(np.isnan(lat) | np.isnan(lon))
+
+    def _points(self, mask: np.ndarray) -> np.ndarray:
+        lat = np.frombuffer(self._lat, dtype=np.float64)[mask]
+        lon = np.frombuffer(self._lon, dtype=np.float64)[mask]
+        return np.column_stack((lat, lon))
+
+    def points(self) -> np.ndarray:
+        """(N, 2) float64 array of (lat, lon) for all geotagged items (a copy)."""
+        return self._points(self._gps_mask())
+
+    def gps_view(self) -> Tuple[List[Path], np.ndarray]:
+        """Paths and (lat, lon) points of all geotagged items."""
+        mask = self._gps_mask()
+        return list(compress(self._paths, mask)), self._points(mask)
+
+    def _iter_features(self, html_dir: Path, thumbs: Dict[Path, str] | None = None):
+        for p, lat, lon, dt, make, model, extra in zip(
+            self._paths,
+            self._lat,
+            self._lon,
+            self._dt,
+            self._make,
+            self._model,
+            self._extra,
+        ):
+            if isnan(lat) or isnan(lon):
                 continue
 
             # Prefer thumbnail if available; also add a safe relative original path as fallback
-            thumb_rel = thumbs.get(m.path) if thumbs else None
-            img_rel = _safe_rel(html_dir, m.path)
+            thumb_rel = thumbs.get(p) if thumbs else None
+            img_rel = _safe_rel(html_dir, p)
 
             props: Dict[str, Optional[str]] = {
-                "path": str(m.path.name),  # short name for UI/tooltips
-                "datetime": m.datetime,
-                "make": m.make,
-                "model": m.model,
-                **m.extra,
+                "path": str(p.name),  # short name for UI/tooltips
+                "datetime": dt,
+                "make": make,
+                "model": model,
+                **extra,
                 "thumb": thumb_rel,
                 "img_rel": img_rel,
             }
 
-            feat = {
+            coords = [round(lon, COORD_DECIMALS), round(lat, COORD_DECIMALS)]
+            yield {
                 "type": "Feature",
-                "geometry": {"type": "Point", "coordinates": [m.lon, m.lat]},
+                "geometry": {"type": "Point", "coordinates": coords},
                 "properties": props,
             }
-            features.append(feat)
 
-        geo = {"type": "FeatureCollection", "features": features}
+    def to_geojson(self, out_html_path: Path, thumbs: Dict[Path, str] | None = None):
+        """
+        out_html_path = full path to output HTML (e.g., output/map.html).
+        We compute img_rel relative to out_html_path.parent so that the HTML can load originals if needed.
+        Features are streamed to photos.geojson one at a time, so the whole
+        collection never exists in memory as a single object or string.
+        """
+        html_dir = out_html_path.parent
+
         # Write next to HTML (photos.geojson)
-        (out_html_path.parent / "photos.geojson").write_text(
-            json.dumps(geo, indent=2), encoding="utf-8"
-        )
+        with open(html_dir / "photos.geojson", "wb", buffering=_WRITE_BUFFER) as f:
+            f.write(b'{"type":"FeatureCollection","features":[')
+            for i, feat in enumerate(self._iter_features(html_dir, thumbs)):
+                if i:
+                    f.write(b",")
+                f.write(json_dumps(feat))
+            f.write(b"]}")
 
     def to_csv(self, out_path: Path):
-        rows = []
-        for m in self._items:
-            rows.append(
-                {
-                    "path": str(m.path),
-                    "lat": m.lat,
-                    "lon": m.lon,
-                    "datetime": m.datetime,
-                    "make": m.make,
-                    "model": m.model,
-                    **m.extra,
-                }
+        # Columns are already stored separately; only extras need spreading out
+        n = len(self._paths)
+        extras: Dict[str, List[Optional[str]]] = {
+            k: [None] * n for k in sorted({k for e in self._extra for k in e})
+        }
+        for i, e in enumerate(self._extra):
+            for k, v in e.items():
+                extras[k][i] = v
+
+        with open(
+            out_path, "w", encoding="utf-8", newline="", buffering=_WRITE_BUFFER
+        ) as f:
+            writer = csv.writer(f, lineterminator=os.linesep)
+            writer.writerow(
+                ["path", "lat", "lon", "datetime", "make", "model", *extras]
+            )
+            writer.writerows(
+                zip(
+                    map(str, self._paths),
+                    map(_opt, self._lat),
+                    map(_opt, self._lon),
+                    self._dt,
+                    self._make,
+                    self._model,
+                    *extras.values(),
+                )
             )
-        df = pd.DataFrame(rows)
-        df.to_csv(out_path, index=False)
 
     def write_reports(self, out_html_path: Path, thumbs: Dict[Path, str] | None = None):
         out_dir = out_html_path.parent
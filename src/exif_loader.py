@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-import json
+import io
+import os
 import warnings
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -14,36 +16,53 @@ from PIL.ExifTags import GPSTAGS, TAGS
 
 # Optional HEIC support
 try:
-    from pillow_heif import register_heif_opener
+    import pillow_heif
 
-    register_heif_opener()
+    pillow_heif.register_heif_opener()
 except Exception:
-    pass
+    pillow_heif = None
+
+# piexif parses a raw EXIF block without going through an image loader
+try:
+    import piexif
+except Exception:
+    piexif = None
 
 # Avoid DecompressionBomb warnings when Pillow opens very large images
 Image.MAX_IMAGE_PIXELS = None
 warnings.filterwarnings("ignore", category=Image.DecompressionBombWarning)
 
 from geo_utils import dms_to_decimal
+from json_utils import json_loads  # noqa: E402
 from types_ import PhotoMeta
 
+# JPEG keeps EXIF in one APP1 segment (max 64 KB) right after SOI, so 128 KB also
+# covers a leading APP0/JFIF segment. Only JPEGs are parsed from this slice; PNG
+# (eXIf may follow IDAT) and HEIC have no such bound and are parsed whole.
+_EXIF_HEADER_BYTES = 1 << 17
+
 
 # ---------- Helpers for exifread ----------
+def _ratio_to_float(x: Any) -> float:
+    # exifread Ratio is a Fraction subclass, so float() is direct; str() parsing
+    # ("34/1") is only kept for anything that is not a real number already.
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        s = str(x)
+        if "/" in s:
+            num, den = s.split("/")
+            return float(num) / float(den)
+        return float(s)
+
+
 def _ratios_to_decimal(parts: List[Any], ref: Optional[str]) -> Optional[float]:
     """
     exifread returns a list like [34/1, 3/1, 30/1].
     Convert to decimal degrees and apply N/S/E/W sign.
     """
     try:
-        # exifread Ratio has num/den; str() is like "34/1". Do safe eval:
-        def to_float(x):
-            s = str(x)
-            if "/" in s:
-                num, den = s.split("/")
-                return float(num) / float(den)
-            return float(s)
-
-        deg, minute, second = [to_float(p) for p in parts]
+        deg, minute, second = map(_ratio_to_float, parts)
         val = deg + minute / 60.0 + second / 3600.0
         if ref in ("S", "W"):
             val = -val
@@ -59,7 +78,17 @@ def _exifread_extract(path: Path) -> Optional[PhotoMeta]:
     """
     try:
         with path.open("rb") as f:
-            tags = exifread.process_file(f, details=False)
+            head = f.read(_EXIF_HEADER_BYTES)
+            is_jpeg = head[:2] == b"\xff\xd8"
+            tags = {}
+            if is_jpeg:
+                tags = exifread.process_file(
+                    io.BytesIO(head), details=False, extract_thumbnail=False
+                )
+            # Not a JPEG, or no tags in a slice the file extends past: whole file
+            if not tags and (not is_jpeg or len(head) == _EXIF_HEADER_BYTES):
+                f.seek(0)
+                tags = exifread.process_file(f, details=False, extract_thumbnail=False)
 
         # GPS tags names in exifread
         lat_vals = tags.get("GPS GPSLatitude")
@@ -99,6 +128,45 @@ def _exifread_extract(path: Path) -> Optional[PhotoMeta]:
 
 
 # ---------- Google Takeout / sidecar JSON ----------
+@lru_cache(maxsize=1024)
+def _dir_json_names(directory: Path) -> Optional[frozenset]:
+    """
+    Names of the .json files in `directory`, listed once per directory so sidecar
+    probes are set lookups instead of stat calls. None if it cannot be listed.
+    """
+    try:
+        with os.scandir(directory) as it:
+            return frozenset(e.name for e in it if e.name.endswith(".json"))
+    except OSError:
+        return None
+
+
+def takeout_sidecars(path: Path) -> List[Path]:
+    """
+    Sidecar JSON files that may belong to `path`, in lookup order: IMG_1234.JPG.json,
+    then IMG_1234.json. Filtered by the directory listing when it can be read.
+    """
+    candidates = [
+        path.with_suffix(path.suffix + ".json"),
+        path.with_suffix(".json"),
+    ]
+    listed = _dir_json_names(path.parent)
+    if listed is None:
+        return candidates
+    return [c for c in candidates if c.name in listed]
+
+
+def _pick_latlon(d: Dict[str, Any]) -> Tuple[Optional[float], Optional[float]]:
+    lat = d.get("latitude")
+    lon = d.get("longitude")
+    try:
+        lat = float(lat) if lat is not None else None
+        lon = float(lon) if lon is not None else None
+    except Exception:
+        lat = lon = None
+    return lat, lon
+
+
 def _read_takeout_sidecar(
     path: Path,
 ) -> Tuple[Optional[float], Optional[float], Optional[str]]:
@@ -109,35 +177,24 @@ def _read_takeout_sidecar(
       - geoDataExif{ latitude, longitude }
       - photoTakenTime{ timestamp } or { formatted }
     """
-    # Try common variants: IMG_1234.JPG.json, or IMG_1234.json
-    candidates = [
-        path.with_suffix(path.suffix + ".json"),
-        path.with_suffix(".json"),
-    ]
-    for c in candidates:
-        if not c.exists():
+    for c in takeout_sidecars(path):
+        # Unlisted directory: just try the read (EAFP) instead of exists() first
+        try:
+            raw = c.read_bytes()
+        except OSError:
             continue
         try:
-            data = json.loads(c.read_text(encoding="utf-8"))
+            # Raw bytes straight into the parser: no text decode pass
+            data = json_loads(raw)
         except Exception:
             continue
 
-        def pick_latlon(d: Dict[str, Any]) -> Tuple[Optional[float], Optional[float]]:
-            lat = d.get("latitude")
-            lon = d.get("longitude")
-            try:
-                lat = float(lat) if lat is not None else None
-                lon = float(lon) if lon is not None else None
-            except Exception:
-                lat = lon = None
-            return lat, lon
-
         lat = lon = None
         if isinstance(data, dict):
             for key in ("geoDataExif", "geoData", "location"):
                 gd = data.get(key)
                 if isinstance(gd, dict):
-                    lat, lon = pick_latlon(gd)
+                    lat, lon = _pick_latlon(gd)
                     if lat is not None and lon is not None:
                         break
 
@@ -154,8 +211,155 @@ def _read_takeout_sidecar(
     return None, None, None
 
 
+# ---------- Format-specific raw EXIF readers ----------
+# Each returns the raw EXIF block, b"" if the file is of that format but has no
+# EXIF, or None if the file does not look like that format or the block could not
+# be located (use the generic path).
+def _jpeg_raw_exif(path: Path) -> Optional[bytes]:
+    """Walk JPEG marker segments up to SOS and return the APP1 Exif payload."""
+    with path.open("rb") as f:
+        buf = f.read(_EXIF_HEADER_BYTES)
+        if buf[:2] != b"\xff\xd8":
+            return None
+        pos = 2
+        while pos + 4 <= len(buf):
+            if buf[pos] != 0xFF:
+                return b""
+            marker = buf[pos + 1]
+            if marker == 0xFF:  # fill byte
+                pos += 1
+                continue
+            if marker in (0xDA, 0xD9):  # image data / end: no EXIF before it
+                return b""
+            seg_len = int.from_bytes(buf[pos + 2 : pos + 4], "big")
+            if marker == 0xE1 and buf[pos + 4 : pos + 10] == b"Exif\x00\x00":
+                end = pos + 2 + seg_len
+                if end > len(buf):
+                    buf += f.read(end - len(buf))
+                return buf[pos + 4 : end]
+            pos += 2 + seg_len
+    # Ran off the slice (or a truncated file) before image data: unknown
+    return None
+
+
+def _png_raw_exif(path: Path) -> Optional[bytes]:
+    """Seek chunk to chunk (never reading IDAT) until eXIf or IEND."""
+    with path.open("rb") as f:
+        if f.read(8) != b"\x89PNG\r\n\x1a\n":
+            return None
+        while True:
+            head = f.read(8)
+            if len(head) < 8:
+                return b""
+            length = int.from_bytes(head[:4], "big")
+            ctype = head[4:]
+            if ctype == b"eXIf":
+                return f.read(length)
+            if ctype == b"IEND":
+                return b""
+            f.seek(length + 4, io.SEEK_CUR)  # chunk data + CRC
+
+
+def _heif_raw_exif(path: Path) -> Optional[bytes]:
+    """open_heif only parses the container boxes; pixels are decoded lazily."""
+    if pillow_heif is None:
+        return None
+    try:
+        heif = pillow_heif.open_heif(str(path), convert_hdr_to_8bit=False)
+    except Exception:
+        return None
+    return heif.info.get("exif") or b""
+
+
+_RAW_EXIF_READERS = {
+    ".jpg": _jpeg_raw_exif,
+    ".jpeg": _jpeg_raw_exif,
+    ".png": _png_raw_exif,
+    ".heic": _heif_raw_exif,
+    ".heif": _heif_raw_exif,
+}
+
+
+def _text(val: Any) -> Optional[str]:
+    if isinstance(val, bytes):
+        val = val.decode("utf-8", "replace")
+    if val is None:
+        return None
+    val = str(val).strip("\x00 ")
+    return val or None
+
+
+def _piexif_meta(path: Path, raw: bytes) -> Optional[PhotoMeta]:
+    try:
+        exif = piexif.load(raw)
+    except Exception:
+        return None
+    zeroth = exif.get("0th") or {}
+    exif_ifd = exif.get("Exif") or {}
+    gps = exif.get("GPS") or {}
+
+    lat = lon = None
+    if gps:
+        lat = dms_to_decimal(
+            gps.get(piexif.GPSIFD.GPSLatitude, []),
+            _text(gps.get(piexif.GPSIFD.GPSLatitudeRef)),
+        )
+        lon = dms_to_decimal(
+            gps.get(piexif.GPSIFD.GPSLongitude, []),
+            _text(gps.get(piexif.GPSIFD.GPSLongitudeRef)),
+        )
+
+    extra = {}
+    if gps.get(piexif.GPSIFD.GPSAltitude) is not None:
+        try:
+            num, den = gps[piexif.GPSIFD.GPSAltitude]
+            extra["altitude_m"] = str(num / den)
+        except Exception:
+            pass
+
+    return PhotoMeta(
+        path=path,
+        lat=lat,
+        lon=lon,
+        datetime=_text(
+            exif_ifd.get(piexif.ExifIFD.DateTimeOriginal)
+            or zeroth.get(piexif.ImageIFD.DateTime)
+        ),
+        make=_text(zeroth.get(piexif.ImageIFD.Make)),
+        model=_text(zeroth.get(piexif.ImageIFD.Model)),
+        extra=extra,
+    )
+
+
 # ---------- Pillow fallback EXIF ----------
+_EXIF_IFD = 0x8769
+_GPS_IFD = 0x8825
+
+
+def _as_ratio(val: Any) -> Tuple[Any, Any]:
+    """(num, den) from a Pillow IFDRational or an already split pair."""
+    if hasattr(val, "denominator"):
+        return val.numerator, val.denominator
+    return tuple(val)
+
+
 def _pillow_extract(path: Path) -> Optional[PhotoMeta]:
+    # Fast path: pull the EXIF block straight out of the container and parse only
+    # that; the generic Image.open route below is kept for anything else.
+    reader = _RAW_EXIF_READERS.get(path.suffix.lower())
+    if piexif is not None and reader is not None:
+        try:
+            raw = reader(path)
+        except Exception:
+            raw = None
+        if raw == b"":
+            return None
+        if raw:
+            m = _piexif_meta(path, raw)
+            if m is not None:
+                return m
+        # Not located, or piexif is stricter than Pillow: use the generic path
+
     try:
         with Image.open(path) as img:
             exif = img.getexif()
@@ -164,8 +368,13 @@ def _pillow_extract(path: Path) -> Optional[PhotoMeta]:
                 for tag_id, val in exif.items():
                     tag = TAGS.get(tag_id, tag_id)
                     data[tag] = val
+                # Pillow keeps the Exif and GPS sub-IFDs behind their offset tags
+                for tag_id, val in exif.get_ifd(_EXIF_IFD).items():
+                    data.setdefault(TAGS.get(tag_id, tag_id), val)
 
             gps_info_raw = data.get("GPSInfo", {})
+            if exif and not isinstance(gps_info_raw, dict):
+                gps_info_raw = exif.get_ifd(_GPS_IFD)
             gps_data = {}
             if gps_info_raw:
                 for key in gps_info_raw.keys():
@@ -175,10 +384,12 @@ def _pillow_extract(path: Path) -> Optional[PhotoMeta]:
             lat = lon = None
             if gps_data:
                 lat = dms_to_decimal(
-                    gps_data.get("GPSLatitude", []), gps_data.get("GPSLatitudeRef")
+                    map(_as_ratio, gps_data.get("GPSLatitude", [])),
+                    gps_data.get("GPSLatitudeRef"),
                 )
                 lon = dms_to_decimal(
-                    gps_data.get("GPSLongitude", []), gps_data.get("GPSLongitudeRef")
+                    map(_as_ratio, gps_data.get("GPSLongitude", [])),
+                    gps_data.get("GPSLongitudeRef"),
                 )
 
             dt = (
@@ -192,7 +403,7 @@ def _pillow_extract(path: Path) -> Optional[PhotoMeta]:
             extra = {}
             if gps_data.get("GPSAltitude") is not None:
                 try:
-                    num, den = gps_data["GPSAltitude"]
+                    num, den = _as_ratio(gps_data["GPSAltitude"])
                     extra["altitude_m"] = str(num / den)
                 except Exception:
                     pass
@@ -242,17 +453,22 @@ def read_photo_meta(path: Path) -> PhotoMeta:
     model = m.model if m else None
     extra: Dict[str, str] = {}
 
-    # 2) sidecar JSON (fill gaps; prefer EXIF coords if present)
-    s_lat, s_lon, s_dt = _read_takeout_sidecar(path)
-    if lat is None and s_lat is not None:
-        lat = s_lat
-    if lon is None and s_lon is not None:
-        lon = s_lon
-    if dt is None and s_dt is not None:
-        dt = s_dt
+    # 2) sidecar JSON (fill gaps; prefer EXIF coords if present).
+    # Skipped entirely when EXIF already gave us coords and a timestamp.
+    need_gps = lat is None or lon is None
+    need_dt = dt is None
+    if need_gps or need_dt:
+        s_lat, s_lon, s_dt = _read_takeout_sidecar(path)
+        if lat is None and s_lat is not None:
+            lat = s_lat
+        if lon is None and s_lon is not None:
+            lon = s_lon
+        if dt is None and s_dt is not None:
+            dt = s_dt
+        need_gps = lat is None or lon is None
 
     # If we still have nothing meaningful, try Pillow
-    if (lat is None or lon is None) and (m is None):
+    if need_gps and m is None:
         pm = _pillow_extract(path)
         if pm:
             if lat is None:
@@ -1,5 +1,11 @@
 from typing import Iterable, List, Optional, Tuple
 
+import numpy as np
+
+# Decimals kept for coordinates written to the map outputs: 6 (~0.1 m) is all a
+# web map needs, and the full float repr is ~17 digits
+COORD_DECIMALS = 6
+
 
 def dms_to_decimal(
     dms: Iterable[Tuple[float, float]], ref: Optional[str]
@@ -16,8 +22,10 @@ def dms_to_decimal(
 
 
 def bounds_from_points(points: List[Tuple[float, float]]):
-    if not points:
+    """Return (min_lat, min_lon, max_lat, max_lon) using vectorized reductions."""
+    if len(points) == 0:
         return None
-    lats = [p[0] for p in points]
-    lons = [p[1] for p in points]
-    return (min(lats), min(lons), max(lats), max(lons))
+    arr = np.asarray(points, dtype=np.float64)
+    lo = arr.min(axis=0)
+    hi = arr.max(axis=0)
+    return (float(lo[0]), float(lo[1]), float(hi[0]), float(hi[1]))
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from typing import Any
+
+# Prefer orjson (C, emits bytes directly); fall back to stdlib json if missing
+try:
+    import orjson
+
+    def json_dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def json_loads(data: bytes) -> Any:
+        return orjson.loads(data)
+
+except Exception:
+    import json
+
+    def json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    def json_loads(data: bytes) -> Any:
+        # json.loads accepts bytes and detects the encoding itself
+        return json.loads(data)
@@ -2,9 +2,12 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from cache import cache_key, load_cache, save_cache
 from config import AppConfig
 from data_store import PhotoRepository
 from exif_loader import read_photo_meta
@@ -12,17 +15,67 @@ from map_builder import MapBuilder
 from thumbnails import make_thumbnails
 
 
+# Upper bound on paths handed to a worker per task
+_MAX_CHUNKSIZE = 1000
+
+
+def _iter_files(top: str, recurse: bool):
+    """Yield (name, path) strings via os.scandir; symlinked dirs are skipped."""
+    stack = [top]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_file():
+                        yield entry.name, entry.path
+                    elif recurse and entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+        except OSError:
+            continue
+
+
 def scan_images(images_dir: Path, allowed_exts, recurse=True, limit: int = 0):
+    exts = frozenset(e.lower() for e in allowed_exts)
     count = 0
-    it = images_dir.rglob("*") if recurse else images_dir.glob("*")
-    for p in it:
-        if p.is_file() and p.suffix.lower() in allowed_exts:
-            yield p
+    for name, path in _iter_files(str(images_dir), recurse):
+        if os.path.splitext(name)[1].lower() in exts:
+            yield Path(path)
             count += 1
             if limit and count >= limit:
                 break
 
 
+def _worker_init():
+    # Import in the worker up front so HEIF registration (and the other module
+    # level setup in exif_loader) happens once, not on the first task.
+    import exif_loader  # noqa: F401
+
+
+def read_all_meta(paths, workers: int = 0):
+    """
+    Yield PhotoMeta for every path using a process pool; results keep input order.
+    workers=0 uses all cores, workers=1 stays in-process.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < 2:
+        yield from map(read_photo_meta, paths)
+        return
+    # Big chunks amortize per-task IPC; still split small runs across all workers
+    chunksize = max(1, min(_MAX_CHUNKSIZE, len(paths) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init) as ex:
+        yield from ex.map(read_photo_meta, paths, chunksize=chunksize)
+
+
+def _non_negative_int(value: str) -> int:
+    try:
+        n = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if n < 0:
+        raise argparse.ArgumentTypeError(f"must be >= 0, got {n}")
+    return n
+
+
 def generate_demo_points(n: int = 1000):
     import random
 
@@ -73,6 +126,19 @@ def main(argv=None):
     parser.add_argument(
         "--limit", type=int, default=0, help="Limit photos processed (0=no limit)"
     )
+    parser.add_argument(
+        "--workers",
+        type=_non_negative_int,
+        default=0,
+        help="Worker processes for EXIF and thumbnails (0=all cores)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        default=True,
+        help="Ignore the metadata cache and rebuild it",
+    )
     parser.add_argument("--verbose", action="store_true", help="Verbose logging")
     parser.add_argument(
         "--demo",
@@ -133,9 +199,25 @@ def main(argv=None):
 
     repo = PhotoRepository()
     total, with_gps, without_gps = 0, 0, 0
-    for p in scan_images(images_dir, cfg.allowed_exts, cfg.recurse, limit=args.limit):
+    paths = list(
+        scan_images(images_dir, cfg.allowed_exts, cfg.recurse, limit=args.limit)
+    )
+
+    # Reuse metadata of unchanged photos from the previous run; --no-cache
+    # re-reads everything and rebuilds the manifest from scratch
+    cache_file = out_dir / "meta_cache.json"
+    cache = load_cache(cache_file) if args.use_cache else {}
+    keys = [cache_key(p) for p in paths]
+    cached = [cache.get(k) if k else None for k in keys]
+    misses = [p for p, m in zip(paths, cached) if m is None]
+    fresh = read_all_meta(misses, workers=args.workers)
+
+    metas = []
+    for p, m in zip(paths, cached):
+        if m is None:
+            m = next(fresh)
+        metas.append(m)
         total += 1
-        m = read_photo_meta(p)
         if m.lat is None or m.lon is None:
             repo.skip(p)
             without_gps += 1
@@ -145,20 +227,25 @@ def main(argv=None):
             with_gps += 1
             if args.verbose:
                 print(f"OK: {p} -> ({m.lat:.6f},{m.lon:.6f})")
-        repo.add(m)
+    # Only advanced with next(), so it never reaches StopIteration by itself;
+    # close it to shut the EXIF worker pool down before thumbnails start theirs
+    fresh.close()
+    repo.add_many(metas)
 
     out_dir.mkdir(parents=True, exist_ok=True)
+    save_cache(cache_file, [(k, m) for k, m in zip(keys, metas) if k])
     thumbs_dir = out_dir / "thumbs"
-    gps_paths = [
-        m.path for m in repo.items() if m.lat is not None and m.lon is not None
-    ]
-    thumb_map = make_thumbnails(gps_paths, thumbs_dir, size=(256, 256))
+    gps_paths, pts = repo.gps_view()
+    # The cache keys already hold each photo's (mtime_ns, size)
+    stamps = {p: (k[1], k[2]) for p, k in zip(paths, keys) if k}
+    thumb_map = make_thumbnails(
+        gps_paths, thumbs_dir, size=(256, 256), workers=args.workers, stamps=stamps
+    )
 
     # Write reports (GeoJSON next to HTML; includes thumb + img_rel)
     repo.write_reports(out_html, thumbs=thumb_map)
 
     # Build the map
-    pts = repo.points()
     mb = MapBuilder(default_zoom_start=cfg.default_zoom_start)
     mb.build_map(
         points=pts,
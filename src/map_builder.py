@@ -1,14 +1,32 @@
 from __future__ import annotations
 
-import json
+import hashlib
 from pathlib import Path
 from typing import List, Optional, Tuple
 
 import folium
+import numpy as np
 from folium.plugins import Fullscreen, HeatMap, MarkerCluster, MeasureControl, MiniMap
 
 from config import BASEMAPS, AppConfig
-from geo_utils import bounds_from_points
+from geo_utils import COORD_DECIMALS, bounds_from_points
+from json_utils import json_dumps, json_loads
+
+# Optional minifiers for the inlined CSS/JS (passthrough if not installed)
+try:
+    from rcssmin import cssmin as _cssmin
+except Exception:
+
+    def _cssmin(css: str) -> str:
+        return css
+
+
+try:
+    from rjsmin import jsmin as _jsmin
+except Exception:
+
+    def _jsmin(js: str) -> str:
+        return js
 
 
 def _add_basemaps(fmap: folium.Map, default_name: str = "CartoDB Positron"):
@@ -63,11 +81,12 @@ html, body {{
 #gallery-count {{ font-size:12px; color:#666; margin:6px 0 8px; }}
 .badge {{ background:#eee; border-radius:999px; padding:2px 8px; font-size:11px; color:#333; }}
 
-/* Bigger tiles (single column) */
+/* Bigger tiles (single column); virtualized, JS sets grid height and tile tops */
 .grid {{
-  display: grid;
-  grid-template-columns: 1fr;
-  gap: 10px;
+  position: relative;
+}}
+.grid > img, .grid > .tile {{
+  position: absolute; left: 0; width: 100%;
 }}
 .grid img {{
   width: 100%;
@@ -188,11 +207,7 @@ _VIEWPORT_JS = """
   // ---------- selection state ----------
   let selectionLayer=null, selectionMarker=null, selectedId=null;
   function ensureSelectionLayer(map){ if(!selectionLayer) selectionLayer=L.layerGroup().addTo(map); return selectionLayer; }
-  function featureId(f){
-    if (!f) return null;
-    const c=(f.geometry&&f.geometry.coordinates)||[], p=(f.properties&&(f.properties.path||f.properties.filename))||"";
-    return [String(c[0]||""),String(c[1]||""),String(p||"")].join("|");
-  }
+  function featureId(f){ return (f && f.properties && f.properties.fid) || null; }
   function clearSelectionHighlight(){ selectedId=null; document.querySelectorAll('#gallery-grid .tile, #gallery-grid img').forEach(el=>el.classList.remove('selected')); }
   function highlightTileById(id){ document.querySelectorAll('#gallery-grid [data-fid]').forEach(el=>{ if (el.getAttribute('data-fid')===id) el.classList.add('selected'); else el.classList.remove('selected'); }); }
 
@@ -211,40 +226,69 @@ _VIEWPORT_JS = """
     }
     return L.bounds(L.point(0,0), L.point(visibleRight, ch));
   }
-  function isInVisibleViewport(map, lat, lon){
-    const p = map.latLngToContainerPoint([lat, lon]);
-    const b = visibleContainerBounds(map);
-    return b.contains(p);
+
+  // ---------- spatial index (fixed lat/lon grid, built once) ----------
+  const GRID_DEG=0.25;
+  function buildGridIndex(features){
+    const cells=new Map(), lat=new Float64Array(features.length), lon=new Float64Array(features.length);
+    features.forEach((f,i)=>{
+      const c=f&&f.geometry&&f.geometry.coordinates;
+      if(!c||!isFinite(c[0])||!isFinite(c[1])){ lat[i]=NaN; lon[i]=NaN; return; }
+      lat[i]=c[1]; lon[i]=c[0];
+      const r=Math.floor(c[1]/GRID_DEG), q=Math.floor(c[0]/GRID_DEG), k=r+':'+q;
+      let cell=cells.get(k); if(!cell) cells.set(k, cell={r:r, q:q, ids:[]});
+      cell.ids.push(i);
+    });
+    return {features:features, cells:cells, lat:lat, lon:lon};
   }
-  function featuresInViewport(map, features){
-    const inside = [];
-    (features||[]).forEach(f=>{ try{ const c=f.geometry&&f.geometry.coordinates; if(!c) return; const lat=c[1], lon=c[0]; if (isInVisibleViewport(map, lat, lon)) inside.push(f); }catch(e){} });
-    return inside;
+  function featuresInViewport(map, index){
+    // Visible rect -> LatLng once; then only cells overlapping it are scanned
+    const b=visibleContainerBounds(map);
+    const nw=map.containerPointToLatLng(b.min), se=map.containerPointToLatLng(b.max);
+    const s=se.lat, n=nw.lat, w=nw.lng, e=se.lng;
+    const r0=Math.floor(s/GRID_DEG), r1=Math.floor(n/GRID_DEG), q0=Math.floor(w/GRID_DEG), q1=Math.floor(e/GRID_DEG);
+    const hits=[];
+    function scan(cell){ cell.ids.forEach(i=>{ const la=index.lat[i], lo=index.lon[i]; if(la>=s && la<=n && lo>=w && lo<=e) hits.push(i); }); }
+    if ((r1-r0+1)*(q1-q0+1) > index.cells.size){
+      index.cells.forEach(cell=>{ if(cell.r>=r0 && cell.r<=r1 && cell.q>=q0 && cell.q<=q1) scan(cell); });
+    } else {
+      for (let r=r0; r<=r1; r++) for (let q=q0; q<=q1; q++){ const cell=index.cells.get(r+':'+q); if(cell) scan(cell); }
+    }
+    hits.sort((a,b)=>a-b); // keep input order for the gallery
+    return hits.map(i=>index.features[i]);
   }
 
   // ---------- thumb popup (click to open full overlay) ----------
-  function escapeAttr(s){ return String(s||'').replace(/"/g,'&quot;'); }
-  function thumbPopupHTML(props){
+  // Static structure parsed once; each popup is a clone filled via properties
+  let popupTpl=null;
+  function thumbPopupNode(props){
+    if (!popupTpl){
+      popupTpl=document.createElement('template');
+      popupTpl.innerHTML='<div style="font-size:12px; text-align:center; max-width: 60vw;">' +
+        '<img loading="lazy" decoding="async" style="max-width: 520px; max-height: 400px; width:auto; height:auto; border-radius:10px; display:block; margin:0 auto 6px;" />' +
+        '<div class="hint" style="font-size:11px; color:#555;">Click the image to view full size</div>' +
+        '<div class="none" style="padding:8px 0;color:#666;">No thumbnail available.</div>' +
+        '<div class="title"></div></div>';
+    }
+    const node=popupTpl.content.firstChild.cloneNode(true);
     const title = (props && (props.path || props.filename)) || "photo";
     const thumbSrc = (props && props.thumb) || null;      // THUMB ONLY in popup
     const fullSrc  = (props && props.img_rel) || null;     // ORIGINAL for overlay
-    let html = '<div style="font-size:12px; text-align:center; max-width: 60vw;">';
+    const img=node.querySelector('img'), hint=node.querySelector('.hint');
     if (thumbSrc){
+      node.querySelector('.none').remove();
+      img.alt=title; img.src=thumbSrc;
       if (fullSrc){
-        html += '<img src="'+thumbSrc+'" alt="'+escapeAttr(title)+'" ' +
-                'data-full="'+escapeAttr(fullSrc)+'" ' +
-                'onclick="window.__PHOTO_OPEN_ORIGINAL(this.getAttribute(\\'data-full\\'), this.alt)" ' +
-                'style="max-width: 520px; max-height: 400px; width:auto; height:auto; border-radius:10px; display:block; margin:0 auto 6px; cursor:zoom-in;" />';
-        html += '<div style="font-size:11px; color:#555;">Click the image to view full size</div>';
+        img.style.cursor='zoom-in';
+        img.addEventListener('click', function(){ window.__PHOTO_OPEN_ORIGINAL(fullSrc, title); });
       } else {
-        html += '<img src="'+thumbSrc+'" alt="'+escapeAttr(title)+'" ' +
-                'style="max-width: 520px; max-height: 400px; width:auto; height:auto; border-radius:10px; display:block; margin:0 auto 6px;" />';
+        hint.remove();
       }
     } else {
-      html += '<div style="padding:8px 0;color:#666;">No thumbnail available.</div>';
+      img.remove(); hint.remove();
     }
-    html += '<div>'+ (title || "") +'</div></div>';
-    return html;
+    node.querySelector('.title').textContent=title;
+    return node;
   }
 
   // ---------- marker placement (popup shows THUMB; click opens ORIGINAL overlay) ----------
@@ -263,7 +307,7 @@ _VIEWPORT_JS = """
 
     selectionMarker
       .addTo(selectionLayer)
-      .bindPopup(thumbPopupHTML(props), {maxWidth: 560, keepInView: true, className: "photo-popup"})
+      .bindPopup(thumbPopupNode(props), {maxWidth: 560, keepInView: true, className: "photo-popup"})
       .openPopup();
 
     selectionMarker.on("popupclose", function(){ try{ selectionLayer.removeLayer(selectionMarker); }catch(e){} selectionMarker=null; clearSelectionHighlight(); });
@@ -274,75 +318,139 @@ _VIEWPORT_JS = """
 
   // ---------- gallery / filtering ----------
   function makeTextTile(text, fid, click){ const div=document.createElement('div'); div.className='tile'; div.setAttribute('data-fid', fid||''); div.textContent=text||'No preview'; if(click) div.onclick=click; return div; }
+  function makeTile(f, fid){
+    const props=f.properties||{}, alt=props.path||'photo';
+    const coords=f.geometry&&f.geometry.coordinates;
+    const thumbSrc = props.thumb; // thumbs ONLY in sidebar
+    const click = function(){ const map=getLeafletMap(); if (!map || !coords || coords.length<2) return; placeSelectionMarker(map, coords[1], coords[0], props, fid); };
+    let el;
+    if (thumbSrc){
+      el=document.createElement('img');
+      // Lazy/async decode; intrinsic size matches the .grid img box (panel 420px minus padding)
+      el.loading='lazy'; el.decoding='async'; el.width=396; el.height=330;
+      el.src=thumbSrc; el.alt=alt; el.title=alt; el.setAttribute('data-fid', fid||'');
+      el.onerror=function(){ const t=makeTextTile(alt,fid,click); t.style.top=el.style.top; el.replaceWith(t); if (liveTiles.get(fid)===el) liveTiles.set(fid, t); if(selectedId===fid) t.classList.add('selected'); };
+      el.onclick=click;
+    } else {
+      el=makeTextTile(alt,fid,click);
+    }
+    if(selectedId===fid) el.classList.add('selected');
+    return el;
+  }
+
+  // Virtualized gallery: only tiles in (or near) the panel's scroll window
+  // exist in the DOM. liveTiles maps fid -> element for those.
+  const ROW_H=340, OVERSCAN=2; // 330px tile + 10px gap
+  const liveTiles=new Map();
+  let galleryFeats=[];
   function renderGallery(features){
     const grid=document.getElementById('gallery-grid');
     const empty=document.getElementById('gallery-empty');
     const inCount=document.getElementById('inview-count');
-    grid.innerHTML=''; inCount.textContent=String(features.length||0);
-    if(!features||!features.length){ if(empty) empty.style.display='block'; return; }
-    if(empty) empty.style.display='none';
-
-    const maxItems=120;
-    features.slice(0,maxItems).forEach(f=>{
-      const fid=featureId(f), props=f.properties||{}, alt=props.path||'photo';
-      const coords=f.geometry&&f.geometry.coordinates;
-      const thumbSrc = props.thumb; // thumbs ONLY in sidebar
-      const click = function(){ const map=getLeafletMap(); if (!map || !coords || coords.length<2) return; placeSelectionMarker(map, coords[1], coords[0], props, fid); };
-
-      if (thumbSrc){
-        const img=document.createElement('img');
-        img.src=thumbSrc; img.alt=alt; img.title=alt; img.setAttribute('data-fid', fid||'');
-        img.onerror=function(){ const t=makeTextTile(alt,fid,click); img.replaceWith(t); if(selectedId===fid) t.classList.add('selected'); };
-        img.onclick=click; if(selectedId===fid) img.classList.add('selected');
-        grid.appendChild(img);
-      } else {
-        const t=makeTextTile(alt,fid,click); if(selectedId===fid) t.classList.add('selected'); grid.appendChild(t);
-      }
+    const seen=new Set();
+    galleryFeats=(features||[]).filter(f=>{ const fid=featureId(f); if(seen.has(fid)) return false; seen.add(fid); return true; });
+    inCount.textContent=String(galleryFeats.length);
+    if(empty) empty.style.display=galleryFeats.length ? 'none' : 'block';
+    grid.style.height=galleryFeats.length ? (galleryFeats.length*ROW_H-10)+'px' : '0px';
+    renderWindow();
+  }
+  function renderWindow(){
+    const grid=document.getElementById('gallery-grid');
+    const panel=document.getElementById('gallery-panel');
+    const top=panel ? panel.scrollTop-grid.offsetTop : 0, h=panel ? panel.clientHeight : 0;
+    const start=Math.max(0, Math.floor(top/ROW_H)-OVERSCAN);
+    const end=Math.min(galleryFeats.length, Math.ceil((top+h)/ROW_H)+OVERSCAN);
+
+    const want=new Map();
+    for (let i=start; i<end; i++) want.set(featureId(galleryFeats[i]), i);
+    liveTiles.forEach((el,fid)=>{ if(!want.has(fid)){ el.remove(); liveTiles.delete(fid); } });
+
+    const batch=document.createDocumentFragment();
+    want.forEach((i,fid)=>{
+      let el=liveTiles.get(fid);
+      if (!el){ el=makeTile(galleryFeats[i], fid); liveTiles.set(fid, el); batch.appendChild(el); }
+      el.style.top=(i*ROW_H)+'px';
     });
+    if (batch.firstChild) grid.appendChild(batch);
   }
 
+  // One delegated handler set per top-level feature group; a marker's popup is bound on its first click
   function bindMarkerPopups(map){
+    const opts={maxWidth:560, keepInView:true, className:"photo-popup"};
+    function markerOf(e){ const l=e.propagatedFrom||e.layer; return (l && l.feature) ? l : null; }
     try{
-      map.eachLayer(function(layer){
-        if (layer && typeof layer.eachLayer==='function'){
-          layer.eachLayer(function(l){
-            if(!l || !l.feature) return;
-            const f=l.feature, fid=featureId(f), props=f.properties||{};
-            l.bindPopup(thumbPopupHTML(props), {maxWidth:560, keepInView:true, className:"photo-popup"});
-            l.on('popupopen', function(){ selectedId=fid; highlightTileById(selectedId); });
-            l.on('popupclose', function(){ clearSelectionHighlight(); });
-            l.on('click', function(){ const fullSrc = props && props.img_rel; if (fullSrc) window.__PHOTO_OPEN_ORIGINAL(fullSrc, props.path || props.filename); });
-          });
-        }
+      const groups=[];
+      map.eachLayer(function(g){ if (g && typeof g.getLayers==='function' && g!==selectionLayer) groups.push(g); });
+      const ids=new Set(groups.map(g=>String(L.stamp(g))));
+      groups.forEach(function(group){
+        // Events bubble to event parents: a group nested in another listed one (the
+        // MarkerClusterGroup's internal _featureGroup) would run every handler twice
+        if (Object.keys(group._eventParents||{}).some(id=>ids.has(id))) return;
+        group.on('click', function(e){
+          const l=markerOf(e); if(!l) return;
+          const props=l.feature.properties||{};
+          if (!l.getPopup()) l.bindPopup(function(){ return thumbPopupNode(props); }, opts).openPopup();
+          const fullSrc = props.img_rel; if (fullSrc) window.__PHOTO_OPEN_ORIGINAL(fullSrc, props.path || props.filename);
+        });
+        group.on('popupopen', function(e){ const l=markerOf(e); if(l){ selectedId=featureId(l.feature); highlightTileById(selectedId); } });
+        group.on('popupclose', function(e){ if(markerOf(e)) clearSelectionHighlight(); });
       });
     }catch(e){}
   }
 
-  function recomputeAndRender(map, all, showAll){
-    const feats = (showAll && showAll.checked) ? all : featuresInViewport(map, all);
+  function recomputeAndRender(map, index, showAll){
+    const feats = (showAll && showAll.checked) ? index.features : featuresInViewport(map, index);
     renderGallery(feats); if (selectedId) highlightTileById(selectedId);
   }
 
+  // features.js loads with defer and may land before or after the map is ready
+  function whenFeaturesReady(cb){
+    if (window.__PHOTO_FEATURES__) return cb(window.__PHOTO_FEATURES__);
+    window.addEventListener('photo-features-ready', function(){ cb(window.__PHOTO_FEATURES__); }, {once: true});
+  }
+
   function init(map){
     ensureSelectionLayer(map);
-    const all=(window.__PHOTO_FEATURES__ && window.__PHOTO_FEATURES__.features) ? window.__PHOTO_FEATURES__.features : [];
+    // Markers keep their popups even if features.js never arrives
+    bindMarkerPopups(map);
+    whenFeaturesReady(function(fc){ start(map, (fc && fc.features) ? fc.features : []); });
+  }
+
+  function start(map, all){
     document.getElementById('total-count').textContent=String(all.length);
 
+    const index=buildGridIndex(all);
     const showAll=document.getElementById('show-all');
-    const initial=(showAll && showAll.checked) ? all : featuresInViewport(map, all);
+    const initial=(showAll && showAll.checked) ? all : featuresInViewport(map, index);
     renderGallery(initial);
 
+    // Coalesce bursts of moveend/resize into one trailing render on the next frame
+    let timer=null, frame=null;
+    function schedule(){
+      if (timer) clearTimeout(timer);
+      timer=setTimeout(function(){
+        timer=null;
+        if (frame) return;
+        frame=requestAnimationFrame(function(){ frame=null; recomputeAndRender(map, index, showAll); });
+      }, 60);
+    }
+
     const follow=document.getElementById('follow-map');
-    map.on('moveend', function(){ if (follow && follow.checked) recomputeAndRender(map, all, showAll); });
+    map.on('moveend', function(){ if (follow && follow.checked) schedule(); });
 
     const refreshBtn=document.getElementById('gallery-refresh');
-    if (refreshBtn) refreshBtn.addEventListener('click', function(){ recomputeAndRender(map, all, showAll); });
+    if (refreshBtn) refreshBtn.addEventListener('click', function(){ recomputeAndRender(map, index, showAll); });
 
-    if (showAll) showAll.addEventListener('change', function(){ recomputeAndRender(map, all, showAll); });
+    if (showAll) showAll.addEventListener('change', schedule);
 
-    window.addEventListener('resize', function(){ recomputeAndRender(map, all, showAll); });
+    window.addEventListener('resize', schedule);
+
+    const panel=document.getElementById('gallery-panel');
+    let scrollFrame=null;
+    if (panel) panel.addEventListener('scroll', function(){
+      if (!scrollFrame) scrollFrame=requestAnimationFrame(function(){ scrollFrame=null; renderWindow(); });
+    }, {passive: true});
 
-    bindMarkerPopups(map);
     console.debug("[photo-map] total features:", all.length);
   }
 
@@ -352,16 +460,29 @@ _VIEWPORT_JS = """
 """
 
 
+# ---------------- Minified blobs (once per process, not per build) ----------------
+def _minify_tag(html: str, tag: str, minify) -> str:
+    """Minify the body of the single <tag>...</tag> block in `html`."""
+    start = html.index(f"<{tag}>") + len(tag) + 2
+    end = html.rindex(f"</{tag}>")
+    return f"<{tag}>{minify(html[start:end])}</{tag}>"
+
+
+# The map id differs per build, so the CSS is minified with a placeholder id
+_MAP_ID_TOKEN = "__PHOTO_MAP_ID__"
+_CSS_MIN = _minify_tag(_css_for(_MAP_ID_TOKEN), "style", _cssmin)
+_VIEWPORT_JS_MIN = _minify_tag(_VIEWPORT_JS, "script", _jsmin)
+
+
 class MapBuilder:
     def __init__(self, default_zoom_start: int = 2):
         self.default_zoom_start = default_zoom_start
 
-    def _initial_center(self, points: List[Tuple[float, float]]) -> Tuple[float, float]:
-        if not points:
+    def _initial_center(self, points: np.ndarray) -> Tuple[float, float]:
+        if len(points) == 0:
             return (20.0, 0.0)
-        lats = [p[0] for p in points]
-        lons = [p[1] for p in points]
-        return (sum(lats) / len(lats), sum(lons) / len(lons))
+        lat, lon = points.mean(axis=0)
+        return (float(lat), float(lon))
 
     def build_map(
         self,
@@ -376,7 +497,10 @@ class MapBuilder:
         cluster: bool = True,
         point_radius: int = 6,
     ):
-        center = self._initial_center(points)
+        # One (N, 2) float64 array shared by center, heat layer and bounds (no
+        # copy when handed the repository's points)
+        arr = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        center = self._initial_center(arr)
 
         # Create map WITHOUT default tiles; we add multiple basemaps next
         fmap = folium.Map(
@@ -387,16 +511,18 @@ class MapBuilder:
         )
 
         # Inject CSS + sidebar
-        fmap.get_root().html.add_child(folium.Element(_css_for(fmap.get_name())))
+        fmap.get_root().html.add_child(
+            folium.Element(_CSS_MIN.replace(_MAP_ID_TOKEN, fmap.get_name()))
+        )
         fmap.get_root().html.add_child(folium.Element(_sidebar_html()))
 
         # Basemaps
         _add_basemaps(fmap, default_name=AppConfig().map_style.default)
 
-        # Heat layer
-        if include_heat and points:
+        # Heat layer (rounded like photos.geojson, which keeps the inlined data small)
+        if include_heat and len(arr):
             HeatMap(
-                points,
+                np.round(arr, COORD_DECIMALS).tolist(),
                 min_opacity=heat_min_opacity,
                 radius=heat_radius,
                 blur=heat_blur,
@@ -406,22 +532,33 @@ class MapBuilder:
 
         # GeoJSON points (and inject features for JS)
         if geojson_file and geojson_file.exists():
-            text = geojson_file.read_text(encoding="utf-8")
             try:
-                gj_data = json.loads(text)
+                gj_data = json_loads(geojson_file.read_bytes())
             except Exception:
                 gj_data = {"type": "FeatureCollection", "features": []}
 
             tooltip = None
             feats = gj_data.get("features") or []
+            # Stable per-feature id, computed once here instead of per lookup in JS.
+            # Keyed on the source file (the short `path` name repeats across
+            # folders, e.g. backups); feature index only as a last resort.
+            for i, f in enumerate(feats):
+                if not f:
+                    continue
+                c = (f.get("geometry") or {}).get("coordinates") or ("", "")
+                props = f["properties"] = f.get("properties") or {}
+                src = props.get("img_rel") or props.get("thumb") or f"#{i}"
+                props["fid"] = f"{c[0]}|{c[1]}|{src}"
             if feats:
+                wanted = ("path", "datetime", "make", "model")
+                target = set(wanted)
                 available = set()
                 for f in feats:
                     props = (f or {}).get("properties") or {}
-                    available |= set(props.keys())
-                fields = [
-                    f for f in ["path", "datetime", "make", "model"] if f in available
-                ]
+                    available |= props.keys() & target
+                    if available == target:
+                        break  # every tooltip field seen; no need to scan the rest
+                fields = [f for f in wanted if f in available]
                 if fields:
                     tooltip = folium.GeoJsonTooltip(
                         fields=fields,
@@ -431,15 +568,34 @@ class MapBuilder:
 
             gj = folium.GeoJson(gj_data, name="Photo points", tooltip=tooltip)
             if cluster:
-                mc = MarkerCluster(name="Clusters")
+                # Chunked loading adds markers across frames instead of one long task
+                mc = MarkerCluster(
+                    name="Clusters",
+                    chunked_loading=True,
+                    chunk_interval=50,
+                    chunk_delay=50,
+                )
                 mc.add_to(fmap)
                 gj.add_to(mc)
             else:
                 gj.add_to(fmap)
 
+            # Gallery data goes to a sibling features.js (not a second inline copy
+            # in the HTML); a plain deferred script also works from file:// where
+            # fetch() is blocked. ?v= busts the browser cache when data changes;
+            # if the file is missing or blocked the gallery starts empty.
+            payload = json_dumps(gj_data)
+            out_html.parent.mkdir(parents=True, exist_ok=True)
+            (out_html.parent / "features.js").write_bytes(
+                b"window.__PHOTO_FEATURES__=" + payload + b";"
+                b'window.dispatchEvent(new Event("photo-features-ready"));'
+            )
+            version = hashlib.blake2b(payload, digest_size=4)
             fmap.get_root().html.add_child(
                 folium.Element(
-                    f"<script>window.__PHOTO_FEATURES__ = {json.dumps(gj_data)};</script>"
+                    f'<script src="features.js?v={version.hexdigest()}" defer'
+                    " onerror=\"window.__PHOTO_FEATURES__={type:'FeatureCollection',features:[]};"
+                    "window.dispatchEvent(new Event('photo-features-ready'));\"></script>"
                 )
             )
         else:
@@ -458,10 +614,10 @@ class MapBuilder:
         folium.LayerControl(position="topleft", collapsed=False).add_to(fmap)
 
         # Viewport-based gallery + selection marker logic
-        fmap.get_root().html.add_child(folium.Element(_VIEWPORT_JS))
+        fmap.get_root().html.add_child(folium.Element(_VIEWPORT_JS_MIN))
 
         # Fit bounds to points if any
-        b = bounds_from_points(points)
+        b = bounds_from_points(arr)
         if b:
             (min_lat, min_lon, max_lat, max_lon) = b
             fmap.fit_bounds([[min_lat, min_lon], [max_lat, max_lon]])
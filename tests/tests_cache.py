@@ -0,0 +1,65 @@
+import os
+
+from cache import cache_key, load_cache, save_cache
+from exif_loader import _dir_json_names
+from types_ import PhotoMeta
+
+
+def test_cache_round_trip_and_invalidation(tmp_path):
+    photo = tmp_path / "a.jpg"
+    photo.write_bytes(b"x" * 10)
+    meta = PhotoMeta(
+        path=photo,
+        lat=48.85,
+        lon=2.35,
+        datetime="2023:01:01 10:00:00",
+        make="Cam",
+        model=None,
+        extra={"altitude_m": "35.0"},
+    )
+    manifest = tmp_path / "meta_cache.json"
+    save_cache(manifest, [(cache_key(photo), meta)])
+
+    assert load_cache(manifest)[cache_key(photo)] == meta
+
+    # Same size, new mtime -> miss
+    st = photo.stat()
+    os.utime(photo, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert cache_key(photo) not in load_cache(manifest)
+
+    # Same mtime, new size -> miss
+    save_cache(manifest, [(cache_key(photo), meta)])
+    mtime_ns = photo.stat().st_mtime_ns
+    photo.write_bytes(b"x" * 11)
+    os.utime(photo, ns=(mtime_ns, mtime_ns))
+    assert cache_key(photo) not in load_cache(manifest)
+
+
+def test_cache_invalidated_by_takeout_sidecar(tmp_path):
+    photo = tmp_path / "a.jpg"
+    photo.write_bytes(b"x" * 10)
+    meta = PhotoMeta(photo, None, None, None, None, None, {})
+    manifest = tmp_path / "meta_cache.json"
+    save_cache(manifest, [(cache_key(photo), meta)])
+    assert cache_key(photo) in load_cache(manifest)
+
+    # Sidecar arrives later (another Takeout archive part) -> miss
+    sidecar = tmp_path / "a.jpg.json"
+    sidecar.write_bytes(b'{"geoData": {"latitude": 48.85, "longitude": 2.35}}')
+    _dir_json_names.cache_clear()
+    assert cache_key(photo) not in load_cache(manifest)
+
+    # Sidecar edited -> miss
+    save_cache(manifest, [(cache_key(photo), meta)])
+    st = sidecar.stat()
+    os.utime(sidecar, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert cache_key(photo) not in load_cache(manifest)
+
+
+def test_cache_missing_or_outdated_manifest(tmp_path):
+    manifest = tmp_path / "meta_cache.json"
+    assert load_cache(manifest) == {}
+    manifest.write_bytes(b'{"version": 0, "items": []}')
+    assert load_cache(manifest) == {}
+    manifest.write_bytes(b"not json")
+    assert load_cache(manifest) == {}
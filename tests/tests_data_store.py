@@ -0,0 +1,84 @@
+import csv
+import json
+
+from data_store import PhotoRepository
+from types_ import PhotoMeta
+
+
+def _repo(img_dir):
+    repo = PhotoRepository()
+    a = PhotoMeta(
+        img_dir / "a.jpg", 48.8566123456, 2.3522987654, "2023:01:01", "Cam", "X1", {}
+    )
+    b = PhotoMeta(img_dir / "b.jpg", None, None, None, None, None, {})
+    c = PhotoMeta(
+        img_dir / "c.jpg", -33.86, 151.21, None, "Cam", None, {"altitude_m": "35.0"}
+    )
+    repo.add_many([a, b])
+    repo.add(c)
+    repo.skip(b.path)
+    return repo, (a, b, c)
+
+
+def test_gps_view_masks_records_without_coords(tmp_path):
+    repo, (a, _, c) = _repo(tmp_path / "img")
+    paths, pts = repo.gps_view()
+    assert paths == [a.path, c.path]
+    assert pts.tolist() == [[a.lat, a.lon], [c.lat, c.lon]]
+    assert repo.points().tolist() == pts.tolist()
+
+
+def test_write_reports(tmp_path):
+    img_dir = tmp_path / "img"
+    repo, (a, b, c) = _repo(img_dir)
+    out_html = tmp_path / "out" / "map.html"
+    repo.write_reports(out_html, thumbs={a.path: "thumbs/a_0123.webp"})
+    out_dir = out_html.parent
+
+    with open(out_dir / "photos.csv", encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows == [
+        ["path", "lat", "lon", "datetime", "make", "model", "altitude_m"],
+        [str(a.path), repr(a.lat), repr(a.lon), "2023:01:01", "Cam", "X1", ""],
+        [str(b.path), "", "", "", "", "", ""],
+        [str(c.path), "-33.86", "151.21", "", "Cam", "", "35.0"],
+    ]
+
+    gj = json.loads((out_dir / "photos.geojson").read_bytes())
+    assert gj["type"] == "FeatureCollection"
+    assert [f["geometry"]["coordinates"] for f in gj["features"]] == [
+        [2.352299, 48.856612],
+        [151.21, -33.86],
+    ]
+    assert [f["properties"] for f in gj["features"]] == [
+        {
+            "path": "a.jpg",
+            "datetime": "2023:01:01",
+            "make": "Cam",
+            "model": "X1",
+            "thumb": "thumbs/a_0123.webp",
+            "img_rel": "../img/a.jpg",
+        },
+        {
+            "path": "c.jpg",
+            "datetime": None,
+            "make": "Cam",
+            "model": None,
+            "altitude_m": "35.0",
+            "thumb": None,
+            "img_rel": "../img/c.jpg",
+        },
+    ]
+
+    # Extras sit between the EXIF fields and the thumbnail/original links
+    assert list(gj["features"][1]["properties"]) == [
+        "path",
+        "datetime",
+        "make",
+        "model",
+        "altitude_m",
+        "thumb",
+        "img_rel",
+    ]
+
+    assert (out_dir / "skipped.txt").read_text(encoding="utf-8") == str(b.path)
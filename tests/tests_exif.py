@@ -0,0 +1,109 @@
+import io
+import os
+import zlib
+
+import piexif
+from PIL import Image
+
+import exif_loader
+from exif_loader import (
+    _jpeg_raw_exif,
+    _piexif_meta,
+    _pillow_extract,
+    _png_raw_exif,
+    read_photo_meta,
+)
+
+
+def _gps_exif() -> bytes:
+    """EXIF block (with "Exif\\0\\0" header) placing the photo in Paris."""
+    gps = {
+        piexif.GPSIFD.GPSLatitudeRef: b"N",
+        piexif.GPSIFD.GPSLatitude: ((48, 1), (51, 1), (0, 1)),
+        piexif.GPSIFD.GPSLongitudeRef: b"E",
+        piexif.GPSIFD.GPSLongitude: ((2, 1), (21, 1), (0, 1)),
+    }
+    return piexif.dump(
+        {"0th": {}, "Exif": {}, "GPS": gps, "1st": {}, "thumbnail": None}
+    )
+
+
+def _png_chunk(ctype: bytes, data: bytes) -> bytes:
+    crc = zlib.crc32(ctype + data).to_bytes(4, "big")
+    return len(data).to_bytes(4, "big") + ctype + data + crc
+
+
+def _png(size=(8, 8), exif: bytes | None = None, exif_after_idat=False) -> bytes:
+    """PNG of random pixels, optionally with an eXIf chunk before or after IDAT."""
+    buf = io.BytesIO()
+    Image.frombytes("RGB", size, os.urandom(size[0] * size[1] * 3)).save(buf, "PNG")
+    png = buf.getvalue()
+    if exif is None:
+        return png
+    chunk = _png_chunk(b"eXIf", exif[6:])  # eXIf holds the bare TIFF block
+    at = png.rindex(b"IEND") - 4 if exif_after_idat else png.index(b"IDAT") - 4
+    return png[:at] + chunk + png[at:]
+
+
+def test_png_exif_after_large_idat(tmp_path):
+    # IDAT alone is far larger than the header slice read for JPEGs
+    p = tmp_path / "late.png"
+    p.write_bytes(_png((800, 800), _gps_exif(), exif_after_idat=True))
+    m = read_photo_meta(p)
+    assert (m.lat, m.lon) == (48.85, 2.35)
+
+
+def _jpeg(exif: bytes | None = None) -> bytes:
+    buf = io.BytesIO()
+    kwargs = {"exif": exif} if exif else {}
+    Image.new("RGB", (8, 8)).save(buf, "JPEG", **kwargs)
+    return buf.getvalue()
+
+
+def test_jpeg_raw_exif_after_app0(tmp_path):
+    p = tmp_path / "a.jpg"
+    data = _jpeg(_gps_exif())
+    assert data[2:4] == b"\xff\xe0"  # JFIF APP0 comes before the EXIF APP1
+    p.write_bytes(data)
+    raw = _jpeg_raw_exif(p)
+    assert raw == _gps_exif()
+    m = _piexif_meta(p, raw)
+    assert (m.lat, m.lon) == (48.85, 2.35)
+
+
+def test_png_raw_exif_before_and_after_idat(tmp_path):
+    for after in (False, True):
+        p = tmp_path / f"a_{after}.png"
+        p.write_bytes(_png(exif=_gps_exif(), exif_after_idat=after))
+        assert _png_raw_exif(p) == _gps_exif()[6:]
+
+
+def test_raw_exif_readers_signature_and_empty(tmp_path):
+    jpg, png = tmp_path / "a.jpg", tmp_path / "a.png"
+    jpg.write_bytes(_jpeg())
+    png.write_bytes(_png())
+    # Wrong format: not mine, use the generic path
+    assert _jpeg_raw_exif(png) is None
+    assert _png_raw_exif(jpg) is None
+    # Right format, no EXIF block
+    assert _jpeg_raw_exif(jpg) == b""
+    assert _png_raw_exif(png) == b""
+
+
+def test_jpeg_exif_past_header_slice_uses_generic_path(tmp_path):
+    # Three ~64 KB APP2 segments push the EXIF APP1 past the 128 KB slice
+    p = tmp_path / "late.jpg"
+    data = _jpeg(_gps_exif())
+    app2 = b"\xff\xe2" + (65000).to_bytes(2, "big") + bytes(64998)
+    p.write_bytes(data[:2] + app2 * 3 + data[2:])
+    assert _jpeg_raw_exif(p) is None
+    m = _pillow_extract(p)
+    assert (m.lat, m.lon) == (48.85, 2.35)
+
+
+def test_pillow_extract_falls_back_when_piexif_rejects(tmp_path, monkeypatch):
+    p = tmp_path / "a.jpg"
+    p.write_bytes(_jpeg(_gps_exif()))
+    monkeypatch.setattr(exif_loader, "_piexif_meta", lambda path, raw: None)
+    m = _pillow_extract(p)
+    assert (m.lat, m.lon) == (48.85, 2.35)
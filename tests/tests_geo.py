@@ -1,7 +1,13 @@
-from src.geo_utils import dms_to_decimal
+from src.geo_utils import bounds_from_points, dms_to_decimal
 
 
 def test_dms_to_decimal():
     # 51° 30' 26" N should be approx 51.5072 (London)
     dms = [(51, 1), (30, 1), (26, 1)]
     assert abs(dms_to_decimal(dms, "N") - 51.5072) < 0.01
+
+
+def test_bounds_from_points():
+    pts = [(48.85, 2.35), (40.71, -74.01), (35.68, 139.69)]
+    assert bounds_from_points(pts) == (35.68, -74.01, 48.85, 139.69)
+    assert bounds_from_points([]) is None
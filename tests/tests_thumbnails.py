@@ -0,0 +1,110 @@
+import io
+
+import piexif
+import pytest
+from PIL import Image, features
+
+import thumbnails
+from thumbnails import make_thumbnails
+
+
+def _jpeg_with_preview(path, full_size, preview_size, preview_color=None):
+    src = Image.linear_gradient("L").resize(full_size).convert("RGB")
+    pv = io.BytesIO()
+    if preview_color:
+        Image.new("RGB", preview_size, preview_color).save(pv, "JPEG")
+    else:
+        src.resize(preview_size).save(pv, "JPEG")
+    exif = piexif.dump(
+        {
+            "0th": {},
+            "Exif": {},
+            "GPS": {},
+            "1st": {piexif.ImageIFD.JPEGInterchangeFormat: 0},
+            "thumbnail": pv.getvalue(),
+        }
+    )
+    src.save(path, "JPEG", exif=exif)
+
+
+def test_embedded_preview_never_exceeds_target(tmp_path, monkeypatch):
+    # JPEG output is where the preview bytes can be copied as-is
+    monkeypatch.setattr(thumbnails, "_SAVE_OPTS", {"format": "JPEG", "quality": 85})
+    monkeypatch.setattr(thumbnails, "_THUMB_EXT", ".jpg")
+    for preview_size in ((240, 160), (300, 200), (1200, 800)):
+        src = tmp_path / f"src_{preview_size[0]}.jpg"
+        _jpeg_with_preview(src, (1800, 1200), preview_size)
+        rel = make_thumbnails([src], tmp_path / "thumbs", size=(256, 256))[src]
+        assert rel.endswith(".jpg")
+        with Image.open(tmp_path / rel) as im:
+            assert im.format == "JPEG"
+            assert im.size[0] <= 256 and im.size[1] <= 256
+            if preview_size[0] <= 256:
+                assert im.size == preview_size  # fits: copied unchanged
+
+
+@pytest.mark.skipif(not features.check("webp"), reason="Pillow built without WebP")
+def test_embedded_preview_reencoded_as_webp(tmp_path):
+    # Default output: the preview is decoded and re-encoded, never copied. A red
+    # preview over a grey frame shows which of the two the thumbnail came from.
+    for preview_size in ((240, 160), (1200, 800)):
+        src = tmp_path / f"src_{preview_size[0]}.jpg"
+        _jpeg_with_preview(src, (1800, 1200), preview_size, preview_color="red")
+        rel = make_thumbnails([src], tmp_path / "thumbs", size=(256, 256))[src]
+        assert rel.endswith(".webp")
+        with Image.open(tmp_path / rel) as im:
+            assert im.format == "WEBP"
+            assert im.size[0] <= 256 and im.size[1] <= 256
+            r, g, b = im.convert("RGB").getpixel((im.width // 2, im.height // 2))
+            assert r > 200 and g < 60 and b < 60
+
+
+def _jpeg_orientation_6(path):
+    # Stored landscape, red left half / blue right half; Orientation 6 displays it
+    # rotated 90 degrees clockwise, i.e. portrait with red on top
+    src = Image.new("RGB", (600, 400), "blue")
+    src.paste("red", (0, 0, 300, 400))
+    exif = piexif.dump({"0th": {piexif.ImageIFD.Orientation: 6}})
+    src.save(path, "JPEG", exif=exif)
+
+
+@pytest.mark.skipif(not features.check("webp"), reason="Pillow built without WebP")
+def test_webp_thumbnail_is_stored_upright(tmp_path):
+    src = tmp_path / "portrait.jpg"
+    _jpeg_orientation_6(src)
+    rel = make_thumbnails([src], tmp_path / "thumbs", size=(256, 256))[src]
+    with Image.open(tmp_path / rel) as im:
+        assert im.format == "WEBP"
+        assert im.height > im.width
+        assert im.getexif().get(thumbnails.EXIF_ORIENTATION_TAG) in (None, 1)
+        r, g, b = im.convert("RGB").getpixel((im.width // 2, 10))
+        assert r > 200 and b < 60
+
+
+def test_jpeg_thumbnail_keeps_orientation_tag(tmp_path, monkeypatch):
+    monkeypatch.setattr(thumbnails, "_SAVE_OPTS", {"format": "JPEG", "quality": 85})
+    monkeypatch.setattr(thumbnails, "_THUMB_EXT", ".jpg")
+    src = tmp_path / "portrait.jpg"
+    _jpeg_orientation_6(src)
+    rel = make_thumbnails([src], tmp_path / "thumbs", size=(256, 256))[src]
+    with Image.open(tmp_path / rel) as im:
+        assert im.width > im.height
+        assert im.getexif().get(thumbnails.EXIF_ORIENTATION_TAG) == 6
+
+
+def test_stale_thumbnails_removed_and_stamps_reused(tmp_path):
+    src = tmp_path / "a.jpg"
+    Image.new("RGB", (64, 48)).save(src, "JPEG")
+    st = src.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    assert thumbnails._safe_thumb_name(src, stamp) == thumbnails._safe_thumb_name(src)
+
+    out = tmp_path / "thumbs"
+    out.mkdir()
+    (out / "a_0123456789ab.jpg").write_bytes(b"old")  # earlier scheme / edit
+    rel = make_thumbnails([src], out, size=(32, 32), stamps={src: stamp})[src]
+    assert sorted(p.name for p in out.iterdir()) == [rel.split("/")[1]]
+
+    # Warm run keeps the current thumbnail
+    assert make_thumbnails([src], out, size=(32, 32), stamps={src: stamp}) == {src: rel}
+    assert (tmp_path / rel).exists()